@@ -10,17 +10,15 @@ CREATE TABLE IF NOT EXISTS books (
   book_title_lc TEXT
 );
 
-CREATE TABLE IF NOT EXISTS ratings (
-  user_id TEXT,
-  isbn TEXT,
-  book_rating INTEGER,
-  PRIMARY KEY (user_id, isbn)
+CREATE TABLE IF NOT EXISTS titles (
+  title_id INTEGER PRIMARY KEY,
+  book_title_lc TEXT UNIQUE
 );
 
-CREATE TABLE IF NOT EXISTS rated_books (
-  user_id TEXT,
+CREATE TABLE IF NOT EXISTS rated_titles (
+  user_id INTEGER,
   isbn TEXT,
   book_rating INTEGER,
-  book_title_lc TEXT,
+  title_id INTEGER,
   PRIMARY KEY (user_id, isbn)
 );
\ No newline at end of file
@@ -1,5 +1,8 @@
 CREATE INDEX IF NOT EXISTS idx_books_book_title_lc
 ON books(book_title_lc);
 
-CREATE INDEX IF NOT EXISTS idx_rated_books_book_title_lc
-ON rated_books(book_title_lc);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_rated_titles_title_id_user_id
+ON rated_titles(title_id, user_id, book_rating);
+
+CREATE INDEX IF NOT EXISTS idx_rated_titles_user_id_title_id
+ON rated_titles(user_id, title_id, book_rating);
\ No newline at end of file
@@ -0,0 +1 @@
+DROP TABLE IF EXISTS ratings;
\ No newline at end of file
@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS title_stats (
+  title_id INTEGER PRIMARY KEY,
+  n_ratings INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_title_stats_n_ratings
+ON title_stats(n_ratings, title_id);
\ No newline at end of file
@@ -0,0 +1,3 @@
+DROP TABLE IF EXISTS rated_books;
+
+DROP TABLE IF EXISTS book_stats;
\ No newline at end of file
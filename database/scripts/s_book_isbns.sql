@@ -0,0 +1,3 @@
+SELECT b.isbn, t.title_id
+FROM books b
+JOIN titles t ON t.book_title_lc = b.book_title_lc;
\ No newline at end of file
@@ -1,2 +0,0 @@
-SELECT DISTINCT user_id FROM rated_books
-WHERE book_title_lc = ?;
\ No newline at end of file
@@ -0,0 +1,4 @@
+SELECT DISTINCT book_title_lc, book_title
+FROM books
+WHERE book_title IS NOT NULL
+ORDER BY book_title_lc ASC, book_title ASC;
\ No newline at end of file
@@ -1,4 +0,0 @@
-SELECT DISTINCT book_title
-FROM books
-WHERE book_title_lc LIKE '%' || ? || '%'
-LIMIT 100;
\ No newline at end of file
@@ -8,14 +8,14 @@ SELECT
     book_title_lc
 FROM
     books
-WHERE (book_title, [index]) IN (
+WHERE (book_title, rowid) IN (
     SELECT
         DISTINCT book_title,
-        MIN([index])
+        MIN(rowid)
     FROM
         books
     WHERE 
-        book_title_lc IN (?) 
+        book_title_lc IN (SELECT value FROM json_each(?))
     AND
         year_of_publication IS NOT NULL
     GROUP BY
@@ -0,0 +1,41 @@
+WITH book AS (
+    SELECT title_id FROM titles
+    WHERE book_title_lc = :book_title_lc
+),
+book_readers AS (
+    SELECT user_id, CAST(ROUND(AVG(book_rating) * 100) AS INTEGER) AS x
+    FROM rated_titles
+    WHERE title_id = (SELECT title_id FROM book)
+    GROUP BY user_id
+),
+user_title_ratings AS (
+    SELECT
+        r.title_id,
+        COUNT(*) AS n_ratings,
+        SUM(r.book_rating) AS sum_rating,
+        br.x,
+        CAST(ROUND(AVG(r.book_rating) * 100) AS INTEGER) AS y
+    FROM rated_titles r
+    JOIN book_readers br ON br.user_id = r.user_id
+    WHERE r.title_id = (SELECT title_id FROM book)
+    OR r.title_id IN (
+        SELECT title_id FROM title_stats
+        WHERE n_ratings >= :min_n_ratings
+    )
+    GROUP BY r.title_id, r.user_id
+)
+SELECT
+    t.book_title_lc,
+    SUM(u.n_ratings) AS n_ratings,
+    1.0 * SUM(u.sum_rating) / SUM(u.n_ratings) AS average_rating,
+    COUNT(*) AS n,
+    SUM(u.x) AS sx,
+    SUM(u.y) AS sy,
+    SUM(u.x * u.x) AS sxx,
+    SUM(u.y * u.y) AS syy,
+    SUM(u.x * u.y) AS sxy
+FROM user_title_ratings u
+JOIN titles t ON t.title_id = u.title_id
+GROUP BY u.title_id
+HAVING SUM(u.n_ratings) >= :min_n_ratings OR u.title_id = (SELECT title_id FROM book)
+ORDER BY t.book_title_lc ASC;
\ No newline at end of file
@@ -1,3 +0,0 @@
-SELECT * FROM rated_books
-WHERE user_id IN (?)
-order by book_title_lc asc;
\ No newline at end of file
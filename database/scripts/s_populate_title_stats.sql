@@ -0,0 +1,4 @@
+INSERT INTO title_stats
+SELECT title_id, COUNT(*)
+FROM rated_titles
+GROUP BY title_id;
\ No newline at end of file
@@ -0,0 +1,5 @@
+INSERT INTO titles (book_title_lc)
+SELECT DISTINCT book_title_lc
+FROM books
+WHERE book_title_lc IS NOT NULL
+ORDER BY book_title_lc ASC;
\ No newline at end of file
@@ -1,4 +1,6 @@
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Query, Request, responses, staticfiles
@@ -8,15 +10,17 @@ from fastapi.templating import Jinja2Templates
 import src.models as models
 import src.utils as utils
 from src.book_recommender import BookRecommender
+from src.config import config
 
 
 @asynccontextmanager
 async def book_recommender_init_lifespan(app: FastAPI):
     """FastAPI lifespan context manager for initializing the BookRecommender.
 
-    This function sets up the `BookRecommender` instance and attaches it
-    to the application's state during startup. On shutdown, it closes connection
-    to the database.
+    This function sets up the `BookRecommender` instance and a thread pool
+    for computing recommendations and attaches them to the application's state
+    during startup. On shutdown, it shuts down the thread pool, clears cached
+    recommendations and closes connection to the database.
 
     Args:
         app: The FastAPI application instance.
@@ -26,9 +30,12 @@ async def book_recommender_init_lifespan(app: FastAPI):
     """
     utils.setup_logging()
     app.state.book_recommender = BookRecommender()
+    app.state.executor = ThreadPoolExecutor(max_workers=config.n_workers)
 
     yield
 
+    app.state.executor.shutdown()
+    app.state.book_recommender.clear_cache()
     app.state.book_recommender.db.close_connection()
 
 
@@ -67,11 +74,12 @@ def home(request: Request):
 @app.post("/recommend", response_model=models.RecommendResponseBody)
 async def recommend(
     request: Request, request_body: models.RecommendRequestBody
-) -> models.RecommendResponseBody:
+) -> dict[str, any]:
     """API endpoint to get book recommendations.
 
     Uses the initialized `BookRecommender` to generate recommendations
     based on the given input book title and number of recommendations.
+    The computation runs in the thread pool, so it does not block the event loop.
 
     Args:
         request: FastAPI request object, used to access app state.
@@ -79,14 +87,17 @@ async def recommend(
             containing `book_title` and `top_n`.
 
     Returns:
-        Recommendation results.
+        Recommendation results, validated and serialized once by FastAPI
+        using `RecommendResponseBody` response model.
 
     Raises:
         HTTPException: If an error occurs during recommendation computation.
     """
     logger.info("Responding to recommend request.")
-    return models.RecommendResponseBody(
-        **request.app.state.book_recommender.recommend(request_body)
+    return await asyncio.get_running_loop().run_in_executor(
+        request.app.state.executor,
+        request.app.state.book_recommender.recommend,
+        request_body,
     )
 
 
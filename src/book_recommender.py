@@ -1,16 +1,45 @@
+import bisect
+import functools
+import itertools
+import json
 import logging
 
 import pandas as pd
 import starlette.status as status
 
 import src.models as models
+import src.utils as utils
 from src.config import config, db_config
-from src.db_client import DatabaseClient
+from src.db_client import get_db_client
 from src.exceptions import ExcCode, UserFacingException
 
 logger = logging.getLogger(__name__)
 
 
+def book_title_exception(exc_code: str, book_title: str) -> UserFacingException:
+    """Create a user-facing exception for a book title recommendations failed for.
+
+    Args:
+        exc_code: `ExcCode.BOOK_NOT_FOUND` or `ExcCode.NOT_ENOUGH_RATINGS`.
+        book_title: Book title to show in the message and as the input.
+
+    Returns:
+        `UserFacingException` with status code 422.
+    """
+    if exc_code == ExcCode.BOOK_NOT_FOUND:
+        msg = f"Book {book_title} is not in the database."
+
+    else:
+        msg = "Not enough ratings by the relevant reviewers to continue."
+
+    return UserFacingException(
+        status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+        exc_code=exc_code,
+        message=msg,
+        input=book_title,
+    )
+
+
 class BookRecommender:
     """A simple filtering book recommender system.
 
@@ -22,88 +51,165 @@ class BookRecommender:
 
     Attributes:
         db: Instance of `DatabaseClient` providing access to SQLite database.
+        get_recommended_books: LRU cached version of `_get_recommended_books`.
+        get_correlations: LRU cached version of `calcualte_correlations`, shared by
+            recommendation requests for the same book with different `top_n`.
+        book_titles: All distinct book titles sorted by their lowercase version.
+        book_titles_lc: Lowercase versions of `book_titles`.
+        book_titles_lc_joined: `book_titles_lc` joined by newlines for substring search.
+        book_title_offsets: Start offsets of titles in `book_titles_lc_joined`.
+        data_version: `DatabaseClient.data_version` the caches and titles were
+            filled from.
     """
 
     def __init__(self):
         """Initialize BookRecommender class.
 
-        Creates an instance of `DatabaseClient`.
+        Gets the shared `DatabaseClient`, sets up caches for recommendations
+        and correlations and loads book titles used for autocomplete.
         """
         logger.info("Initializing DatabaseClient.")
-        self.db = DatabaseClient()
+        self.db = get_db_client()
+        self.get_recommended_books = functools.lru_cache(
+            maxsize=config.recommendation_cache_size
+        )(self._get_recommended_books)
+        self.get_correlations = functools.lru_cache(
+            maxsize=config.correlation_cache_size
+        )(self.calcualte_correlations)
+
+        logger.info("Loading book titles.")
+        self.load_book_titles()
+        self.data_version = self.db.data_version
+
+    def load_book_titles(self):
+        """Load all book titles from the database into sorted in-memory lookups."""
+        self.set_book_titles(
+            self.db.get_thread_connection()
+            .execute(db_config.book_titles_sql)
+            .fetchall()
+        )
 
-    def get_book_titles_by_title(self, title: str) -> list[str]:
-        """Retrieve book titles from the database that partially match a given title.
+    def set_book_titles(self, records: list[tuple[str, str]]):
+        """Build in-memory lookups used for autocomplete from book titles.
 
         Args:
-            title: Full or partial book title to search for.
-
-        Returns:
-            A list of book titles matching the given query (case-insensitive).
+            records: Pairs of lowercase and original book titles sorted
+                by the lowercase title.
         """
-        records = (
-            self.db.get_cursor()
-            .execute(db_config.book_titles_by_title_sql, (title.lower(),))
-            .fetchall()
+        self.book_titles = [r[1] for r in records]
+        self.book_titles_lc = [r[0] for r in records]
+        self.book_titles_lc_joined = "\n".join(self.book_titles_lc)
+        self.book_title_offsets = list(
+            itertools.accumulate((len(t) + 1 for t in self.book_titles_lc), initial=0)
         )
 
-        return [r[0] for r in records]
+    def clear_cache(self):
+        """Clear cached recommendations and correlations."""
+        logger.info("Clearing recommendations cache.")
+        self.get_recommended_books.cache_clear()
+        self.get_correlations.cache_clear()
+
+    def refresh(self):
+        """Clear caches and reload book titles if the database has changed."""
+        if self.data_version == self.db.data_version:
+            return
+
+        logger.info("Database changed, refreshing book titles and caches.")
+        self.data_version = self.db.data_version
+        self.clear_cache()
+        self.load_book_titles()
+
+    def get_book_titles_by_title(self, title: str) -> list[str]:
+        """Retrieve book titles that partially match a given title.
 
-    def get_book_readers(self, title: str) -> list[str]:
-        """Retrieve IDs of users who rated the specified book.
+        Titles starting with the given title are found by binary search and come first.
+        The rest is filled up with titles containing the given title, found by scanning
+        joined lowercase titles until enough suggestions are collected. Newlines
+        separate the joined titles, so they are removed from the given title.
 
         Args:
-            title: The lowercase title of the book.
+            title: Full or partial book title to search for.
 
         Returns:
-            A list of user IDs who rated the given book.
+            A list of at most `config.max_n_suggestions` book titles matching
+            the given query (case-insensitive).
         """
-        records = (
-            self.db.get_cursor()
-            .execute(db_config.book_readers_sql, (title,))
-            .fetchall()
-        )
+        self.refresh()
+
+        title = title.lower().replace("\n", "")
+        start = bisect.bisect_left(self.book_titles_lc, title)
+        end = bisect.bisect_left(self.book_titles_lc, title + chr(0x10FFFF), lo=start)
+        matches = list(range(start, min(end, start + config.max_n_suggestions)))
+
+        pos = 0
+        while len(matches) < config.max_n_suggestions:
+            pos = self.book_titles_lc_joined.find(title, pos)
+            if pos == -1:
+                break
+
+            i = bisect.bisect_right(self.book_title_offsets, pos) - 1
+            if not start <= i < end:
+                matches.append(i)
+
+            pos = self.book_title_offsets[i + 1]
 
-        return [r[0] for r in records]
+        return [self.book_titles[i] for i in matches]
 
     def get_books_by_titles(self, titles: list[str]) -> pd.DataFrame:
         """Retrieve book records for a list of book titles.
 
+        Titles are passed as a single JSON array parameter and unpacked by SQLite,
+        so the query text is the same for any number of titles and is not limited
+        by the maximum number of SQL parameters.
+
         Args:
             titles: List of book titles to retrieve records for.
 
         Returns:
             A pandas DataFrame containing records for the given books.
         """
-        query = db_config.books_by_titles_sql.replace(
-            "?", ", ".join(["?"] * len(titles))
+        return pd.read_sql_query(
+            db_config.books_by_titles_sql,
+            self.db.get_thread_connection(),
+            params=(json.dumps(titles),),
         )
 
-        return pd.read_sql_query(query, self.db.conn, params=titles)
+    def get_correlation_stats(self, title: str) -> pd.DataFrame:
+        """Aggregate ratings of books rated by users who rated the specified book.
 
-    def get_other_books_of_book_readers(self, book_readers: list[str]) -> pd.DataFrame:
-        """Retrieve all books rated by a list of users.
+        The whole aggregation runs in SQLite, so only one row per book is loaded.
+        Ratings of a user for all editions of a book are averaged and rounded
+        to two decimals first. Those averages are scaled by 100 to integers (x for
+        the specified book, y for the other book), so the sums are exact. Titles are
+        stored as integer IDs, so grouping and joins work on integers. Books with
+        fewer than `config.min_n_ratings` ratings by readers of the book can never
+        be compared and are left out, except the specified book itself.
 
         Args:
-            book_readers: List of user IDs who rated the selected book.
+            title: The lowercase title of the book.
 
         Returns:
-            A pandas DataFrame containing all ratings given by these users.
+            A pandas DataFrame indexed by `book_title_lc` with the number of ratings
+            (`n_ratings`) and average rating (`average_rating`) by readers of the book
+            and the number of common readers (`n`) with sums `sx`, `sy`, `sxx`, `syy`
+            and `sxy` over them. Empty if the book is not in the database.
         """
-        query = db_config.other_books_of_book_readers_sql.replace(
-            "?", ", ".join(["?"] * len(book_readers))
+        return pd.read_sql_query(
+            db_config.correlation_stats_sql,
+            self.db.get_thread_connection(),
+            params={"book_title_lc": title, "min_n_ratings": config.min_n_ratings},
+            index_col="book_title_lc",
         )
 
-        return pd.read_sql_query(query, self.db.conn, params=book_readers)
-
-    def calcualte_correlations(self, book_title: str) -> pd.DataFrame:
+    def calcualte_correlations(self, book_title_lc: str) -> pd.DataFrame:
         """Compute correlations between the given book and other books.
 
         Filters out books with too few ratings and computes correlations
         only between the selected book and books rated by the same users.
 
         Args:
-            book_title: Title of the book to base recommendations on.
+            book_title_lc: Title of the book to base recommendations on, already
+                normalized by `utils.normalize_title`.
 
         Returns:
             Pandas DataFrame containing book titles, average ratings and recommendation scores.
@@ -112,97 +218,93 @@ class BookRecommender:
             UserFacingException: If the book is not found in the database or if
                 there are insufficient ratings to compute recommendations.
         """
-        book_readers = self.get_book_readers((book_title_lc := book_title.lower()))
-        if len(book_readers) == 0:
-            msg = f"Book {book_title} is not in the database."
-            logger.exception(msg)
-
-            raise UserFacingException(
-                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
-                exc_code=ExcCode.BOOK_NOT_FOUND,
-                message=msg,
-                input=book_title,
+        book_stats = self.get_correlation_stats(book_title_lc)
+        if len(book_stats) == 0:
+            exc = book_title_exception(ExcCode.BOOK_NOT_FOUND, book_title_lc)
+            logger.exception(exc.detail["message"])
+
+            raise exc
+
+        if (
+            len(book_stats) < 2
+            or book_stats.at[book_title_lc, "n_ratings"] < config.min_n_ratings
+        ):
+            exc = book_title_exception(ExcCode.NOT_ENOUGH_RATINGS, book_title_lc)
+            logger.exception(exc.detail["message"])
+
+            raise exc
+
+        correlations = pd.Series(
+            utils.pearson_from_sums(
+                *(
+                    book_stats[c].to_numpy()
+                    for c in ["n", "sx", "sy", "sxx", "syy", "sxy"]
+                )
+            ),
+            index=book_stats.index,
+            name="correlation_with_selected_book",
+        ).drop(book_title_lc)
+
+        n_skipped = correlations.isna().sum()
+        if n_skipped > 0:
+            logger.debug("Correlation for %d books is NaN. Skipping.", n_skipped)
+
+        n_skipped = (correlations < 0).sum()
+        if n_skipped > 0:
+            logger.debug("Negative correlation for %d books. Skipping.", n_skipped)
+
+        correlations = correlations.loc[correlations >= 0].round(2)
+        average_ratings = book_stats["average_rating"].round(2)
+
+        return (
+            pd.concat(
+                [correlations, average_ratings.reindex(correlations.index)], axis=1
             )
-
-        other_books_of_book_readers = self.get_other_books_of_book_readers(book_readers)
-
-        n_ratings_per_book = (
-            other_books_of_book_readers.groupby("book_title_lc")["user_id"]
-            .count()
+            .rename_axis("book_title_lc")
             .reset_index()
-            .rename(columns={"user_id": "n_ratings"})
-        )
-
-        books_to_compare = n_ratings_per_book.loc[
-            n_ratings_per_book.n_ratings >= config.min_n_ratings, "book_title_lc"
-        ]
-        if len(books_to_compare) < 2:
-            msg = "Not enough ratings by the relevant reviewers to continue."
-            logger.exception(msg)
-
-            raise UserFacingException(
-                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
-                exc_code=ExcCode.NOT_ENOUGH_RATINGS,
-                message=msg,
-                input=book_title,
+            .sort_values(
+                "correlation_with_selected_book", ascending=False, kind="stable"
             )
+            .reset_index(drop=True)
+        )
 
-        ratings_of_book_readers = other_books_of_book_readers.loc[
-            other_books_of_book_readers.book_title_lc.isin(books_to_compare),
-            ["user_id", "book_rating", "book_title_lc"],
-        ]
+    def _get_recommended_books(
+        self, book_title_lc: str, top_n: int
+    ) -> tuple[int, tuple[dict[str, any], ...]]:
+        """Compute recommended books with their metadata for a given book.
 
-        ratings_of_book_readers_nodup = (
-            ratings_of_book_readers.groupby(["user_id", "book_title_lc"])["book_rating"]
-            .mean()
-            .round(2)
-            .to_frame()
-            .reset_index()
-        )
+        Args:
+            book_title_lc: The normalized title of the book to base recommendations on.
+            top_n: Number of recommendations to return, 0 means all.
 
-        df_corr = ratings_of_book_readers_nodup.pivot(
-            index="user_id", columns="book_title_lc", values="book_rating"
-        )
+        Returns:
+            A tuple of the number of recommendations and a tuple of dictionaries
+            representing recommended books (fields of `RecommendResponseRecord`).
+        """
+        logger.info("Calculating correlations.")
+        corrs = self.get_correlations(book_title_lc)
+        top_n = top_n if top_n > 0 else len(corrs)
+        corrs = corrs.head(top_n)
 
-        correlations = []
-        for bt in df_corr.columns:
-            if bt == book_title_lc:
-                continue
-
-            correlation = df_corr[book_title_lc].corr(df_corr[bt])
-            if pd.isna(correlation):
-                logger.debug("Correlation for book %s is NaN. Skipping.", bt)
-                continue
-
-            if correlation < 0:
-                logger.debug("Negative correlation for book %s. Skipping.", bt)
-                continue
-
-            curr_book_subset = ratings_of_book_readers.loc[
-                ratings_of_book_readers.book_title_lc == bt
-            ]
-
-            correlations.append(
-                {
-                    "book_title_lc": bt,
-                    "correlation_with_selected_book": round(correlation, 2),
-                    "average_rating": round(curr_book_subset.book_rating.mean(), 2),
-                }
-            )
+        logger.info("Getting books by titles.")
+        books = self.get_books_by_titles(corrs.book_title_lc.values.tolist())
 
-        return pd.DataFrame(
-            sorted(
-                correlations,
-                key=lambda x: x["correlation_with_selected_book"],
-                reverse=True,
-            )
+        logger.info("Merging correlations with books.")
+        recommended_books = (
+            corrs.merge(books, on="book_title_lc")
+            .drop(columns=["book_title_lc"])
+            .to_dict(orient="records")
         )
 
+        return top_n, tuple(recommended_books)
+
     def recommend(self, request: models.RecommendRequestBody) -> dict[str, any]:
         """Generate book recommendations for a given book.
 
         Retrieve books rated by similar readers and ranks them
-        by correlation strength and average rating.
+        by correlation strength and average rating. Results are cached
+        by normalized book title and `top_n` until the database changes, errors
+        refer to the book title from the request.
 
         Args:
             request: Pydantic model containing the target book title (`book_title`)
@@ -212,28 +314,25 @@ class BookRecommender:
             A dictionary with the following keys:
                 - 'book_title': The original book title from the request.
                 - 'top_n': The number of recommendations returned.
-                - 'recommended_books': A list of `RecommendResponseRecord` objects
-                    representing recommended books and their metadata.
+                - 'recommended_books': A list of dictionaries representing
+                    recommended books and their metadata.
+
+        Raises:
+            UserFacingException: If the book is not found in the database or if
+                there are insufficient ratings to compute recommendations.
         """
-        logger.info("Calculating correlations.")
-        corrs = self.calcualte_correlations(book_title=request.book_title)
-        top_n = request.top_n if request.top_n > 0 else len(corrs)
-        corrs = corrs.head(top_n)
+        self.refresh()
 
-        logger.info("Getting books by titles.")
-        books = self.get_books_by_titles(corrs.book_title_lc.values.tolist())
+        try:
+            top_n, recommended_books = self.get_recommended_books(
+                utils.normalize_title(request.book_title), request.top_n
+            )
 
-        logger.info("Merging correlations with books.")
-        recommended_books = (
-            corrs.merge(books, on="book_title_lc")
-            .drop(columns=["book_title_lc"])
-            .to_dict(orient="records")
-        )
+        except UserFacingException as exc:
+            raise book_title_exception(exc.detail["code"], request.book_title) from exc
 
         return {
             "book_title": request.book_title,
             "top_n": top_n,
-            "recommended_books": [
-                models.RecommendResponseRecord(**r) for r in recommended_books
-            ],
+            "recommended_books": list(recommended_books),
         }
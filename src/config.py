@@ -1,8 +1,10 @@
-from dataclasses import asdict, dataclass, field
+import functools
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Config:
     """General configuration for dataset and preprocessing.
 
@@ -13,67 +15,104 @@ class Config:
         string_cols: Columns in the dataset expected to be strings.
         non_lc_bound: Index separating columns that should be lowercased.
         min_n_ratings: Minimum number of ratings needed to consider a book for recommendations.
+        recommendation_cache_size: Maximum number of cached recommendation results.
+        correlation_cache_size: Maximum number of books with cached correlations.
+        max_n_suggestions: Maximum number of book titles suggested by autocomplete.
+        n_workers: Number of threads computing recommendations.
     """
 
     data_dir: Path = Path("data")
     logs_dir: Path = Path("logs")
     kaggle_handle: str = "arashnic/book-recommendation-dataset"
-    string_cols: list[str] = field(
-        default_factory=lambda: [
-            "book_title",
-            "book_author",
-            "publisher",
-            "book_title_lc",
-        ]
+    string_cols: tuple[str, ...] = (
+        "book_title",
+        "book_author",
+        "publisher",
+        "book_title_lc",
     )
     non_lc_bound: int = 3
     min_n_ratings: int = 8
+    recommendation_cache_size: int = 1024
+    correlation_cache_size: int = 128
+    max_n_suggestions: int = 100
+    n_workers: int = os.cpu_count() or 1
 
 
-@dataclass(frozen=True)
+@functools.lru_cache
+def read_sql_scripts(path: Path) -> dict[str, str]:
+    """Read all SQL scripts in a directory in one pass, caching their content.
+
+    Args:
+        path: Path to the directory containing SQL scripts.
+
+    Returns:
+        Dictionary mapping script names without the `.sql` suffix to their content.
+    """
+    with os.scandir(path) as entries:
+        return {
+            e.name[:-4]: Path(e.path).read_bytes().decode("utf-8")
+            for e in entries
+            if e.name.endswith(".sql") and e.is_file()
+        }
+
+
+@dataclass(frozen=True, slots=True)
 class DatabaseConfig:
     """Configuration for database file locations and SQL scripts.
 
+    All SQL scripts in `db_scripts` are read on first access of `scripts`
+    or one of the `*_sql` attributes.
+
     Attributes:
         db_dir: Directory where the SQLite database is stored.
         db_path: Full path to the SQLite database file.
         db_scripts: Path to the directory containing SQL query files.
         table_names: Names of all expected tables.
-        table_names_set: Set version of `table_names` for quick lookup.
-        book_readers_sql: SQL script for selecting readers of a book.
-        other_books_of_book_readers_sql: SQL script to find other books rated by same users.
-        books_by_titles: SQL script to get metadata for a list of books by title.
+        pragmas: PRAGMA statements run on every new connection: WAL journal
+            (readers do not block the writer, fewer fsyncs), 64 MB page cache,
+            in-memory temporary storage and 256 MB memory-mapped I/O.
+        scripts: Content of all SQL scripts by name without the `.sql` suffix.
+        correlation_stats_sql: SQL script to aggregate ratings of books rated by readers
+            of a book into sums needed for their correlations with the book.
+        books_by_titles_sql: SQL script to get metadata for a list of books by title.
+        book_titles_sql: SQL script to get all book titles sorted by lowercase title.
+        book_isbns_sql: SQL script to get title IDs of all books by ISBN.
     """
 
     db_dir: Path = Path("database")
     db_path: Path = db_dir / "books.db"
     db_scripts: Path = db_dir / "scripts"
-    table_names: list[str] = field(
-        default_factory=lambda: ["books", "ratings", "rated_books"]
+    table_names: tuple[str, ...] = ("books", "titles", "rated_titles", "title_stats")
+    pragmas: tuple[str, ...] = (
+        "PRAGMA journal_mode = WAL;",
+        "PRAGMA synchronous = NORMAL;",
+        "PRAGMA cache_size = -65536;",
+        "PRAGMA temp_store = MEMORY;",
+        "PRAGMA mmap_size = 268435456;",
     )
-    table_names_set: set[str] = field(init=False)
 
-    book_readers_sql: str = field(init=False)
-    other_books_of_book_readers_sql: str = field(init=False)
-    books_by_titles: str = field(init=False)
+    @property
+    def scripts(self) -> dict[str, str]:
+        return read_sql_scripts(self.db_scripts)
+
+    @property
+    def correlation_stats_sql(self) -> str:
+        return self.scripts["s_correlation_stats"]
+
+    @property
+    def books_by_titles_sql(self) -> str:
+        return self.scripts["s_books_by_titles"]
 
-    def __post_init__(self):
-        object.__setattr__(self, "table_names_set", set(self.table_names))
+    @property
+    def book_titles_sql(self) -> str:
+        return self.scripts["s_book_titles"]
 
-        for script_fn in [
-            "s_book_readers",
-            "s_other_books_of_book_readers",
-            "s_books_by_titles",
-            "s_book_titles_by_title",
-        ]:
-            object.__setattr__(
-                self,
-                f"{script_fn[2:]}_sql",
-                (self.db_scripts / f"{script_fn}.sql").read_text(encoding="utf-8"),
-            )
+    @property
+    def book_isbns_sql(self) -> str:
+        return self.scripts["s_book_isbns"]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LoggingFormatterConfig:
     """Defines format string for a log formatter.
 
@@ -83,8 +122,12 @@ class LoggingFormatterConfig:
 
     format: str = "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"
 
+    def to_dict(self):
+        """Convert the formatter config to dictionary format used by logging.config.dictConfig()."""
+        return {"format": self.format}
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LoggingHandlerConfig:
     """Configuration for a log handler.
 
@@ -111,7 +154,7 @@ class LoggingHandlerConfig:
         return data
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LoggingLoggerConfig:
     """Configuration for a logger.
 
@@ -125,8 +168,16 @@ class LoggingLoggerConfig:
     level: str
     propagate: bool
 
+    def to_dict(self):
+        """Convert the logger config to dictionary format used by logging.config.dictConfig()."""
+        return {
+            "handlers": list(self.handlers),
+            "level": self.level,
+            "propagate": self.propagate,
+        }
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LoggingConfig:
     """Top-level configuration for logging.
 
@@ -193,12 +244,16 @@ class LoggingConfig:
         return {
             "version": self.version,
             "disable_existing_loggers": self.disable_existing_loggers,
-            "formatters": {name: asdict(fmt) for name, fmt in self.formatters.items()},
+            "formatters": {
+                name: fmt.to_dict() for name, fmt in self.formatters.items()
+            },
             "handlers": {
                 name: handler.to_dict() for name, handler in self.handlers.items()
             },
-            "loggers": {name: asdict(logger) for name, logger in self.loggers.items()},
-            "root": asdict(self.root),
+            "loggers": {
+                name: logger.to_dict() for name, logger in self.loggers.items()
+            },
+            "root": self.root.to_dict(),
         }
 
 
@@ -1,82 +1,133 @@
+import functools
 import logging
 import sqlite3
+import threading
 from pathlib import Path
 
+import pandas as pd
+
 from src.config import db_config
 from src.utils import preprocess
 
 logger = logging.getLogger(__name__)
 
+_TABLE_NAMES: frozenset[str] = frozenset(db_config.table_names)
+_EXISTS_SQL: dict[str, str] = {
+    tn: f"SELECT EXISTS (SELECT 1 FROM {tn});" for tn in db_config.table_names
+}
+_TABLES_EXIST_SQL: str = " UNION ALL ".join(
+    f"SELECT '{tn}', EXISTS (SELECT 1 FROM {tn})" for tn in db_config.table_names
+)
 
-class Singleton(type):
-    """Singleton metaclass.
-
-    Attributes:
-        _instances: Dictionary of existing instances of children classes.
-    """
-
-    _instances = {}
-
-    def __call__(cls, *args, **kwargs):
-        """Call method of the metaclass.
 
-        Returns:
-            Instance of the child class.
-        """
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-
-        else:
-            cls._instances[cls].__init__(*args, **kwargs)
-
-        return cls._instances[cls]
-
-
-class DatabaseClient(metaclass=Singleton):
-    """DatabaseClient (singleton) class provides an interface for connecting to and
+class DatabaseClient:
+    """DatabaseClient class provides an interface for connecting to and
     managing local database.
 
     Attributes:
         conn: Database connection object.
+        cursor: Cursor of `conn` returned by `get_cursor`.
+        thread_conns: Connections opened by `get_thread_connection`.
+        data_version: Counter increased whenever data in the database change,
+            so that results computed from older data can be recognized.
     """
 
+    data_version: int = 0
+
     def __init__(self) -> None:
         """Initialize DatabaseClient class.
 
         Open connection. Run init scripts and populate tables if not yet populated.
+        Tables created by the init scripts are known to be empty without checking.
         """
-        self.kaggle_path = None
+        self.thread_conns = []
+        self._thread_local = threading.local()
+        self._lock = threading.Lock()
 
         self.open_connection()
+        existing_tables = self.get_existing_tables()
         self.run_init_scripts()
-        self.populate_tables()
+        self.populate_tables(existing_tables)
 
     def open_connection(self):
-        """Open database connection."""
+        """Open database connection.
+
+        The connection may be used from worker threads serving API requests.
+        """
         logger.info("Opening DB connection.")
-        self.conn = sqlite3.connect(db_config.db_path)
+        self.conn = self.connect()
+        self.cursor = self.conn.cursor()
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a new connection to the database configured by `db_config.pragmas`.
+
+        The connection is in autocommit mode, transactions are begun explicitly
+        where several statements should be committed together.
+
+        Returns:
+            Connection object.
+        """
+        conn = sqlite3.connect(
+            db_config.db_path, isolation_level=None, check_same_thread=False
+        )
+        for pragma in db_config.pragmas:
+            conn.execute(pragma)
+
+        return conn
 
     def close_connection(self):
-        """Close database connection."""
+        """Close database connection and connections of all threads."""
         logger.info("Closing DB connection.")
         if self.conn:
+            self.cursor.close()
             self.conn.close()
             self.conn = None
+            self.cursor = None
+
+        with self._lock:
+            for conn in self.thread_conns:
+                conn.close()
+
+            self.thread_conns = []
+            self._thread_local = threading.local()
 
     def ensure_connection(self):
         """Ensure database connection is open."""
         if not self.conn:
             self.open_connection()
 
+    def get_thread_connection(self) -> sqlite3.Connection:
+        """Get a database connection owned by the calling thread.
+
+        SQLite serializes all statements on one connection, so worker threads
+        serving API requests query through their own connections to run in parallel.
+        The connection is opened on first use in each thread.
+
+        Returns:
+            Connection object.
+        """
+        conn = getattr(self._thread_local, "conn", None)
+        if conn is None:
+            conn = self.connect()
+            with self._lock:
+                self.thread_conns.append(conn)
+
+            self._thread_local.conn = conn
+
+        return conn
+
     def get_cursor(self) -> sqlite3.Cursor:
         """Get database connection cursor required for executing database commands.
 
+        The cursor is opened with the connection and reused by all calls, so it must
+        not be used concurrently. Worker threads use `get_thread_connection`.
+
         Returns:
             Cursor object.
         """
         self.ensure_connection()
 
-        return self.conn.cursor()
+        return self.cursor
 
     def is_empty(self, table_name: str) -> bool:
         """Check if table with provided table_name is empty.
@@ -90,11 +141,34 @@ class DatabaseClient(metaclass=Singleton):
         self.validate_table_name(table_name)
 
         return not bool(
-            self.get_cursor()
-            .execute(f"SELECT EXISTS (SELECT 1 FROM {table_name});")
-            .fetchone()[0]
+            self.get_cursor().execute(_EXISTS_SQL[table_name]).fetchone()[0]
         )
 
+    def get_existing_tables(self) -> set[str]:
+        """Get names of all tables in the database.
+
+        Returns:
+            Set of table names.
+        """
+        return {
+            r[0]
+            for r in self.get_cursor().execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table';"
+            )
+        }
+
+    def get_empty_tables(self) -> set[str]:
+        """Check which of the expected tables are empty in a single query.
+
+        Returns:
+            Set of names of empty tables.
+        """
+        return {
+            tn
+            for tn, not_empty in self.get_cursor().execute(_TABLES_EXIST_SQL)
+            if not not_empty
+        }
+
     def validate_table_name(self, table_name: str):
         """Validate whether a given table name is recognized.
 
@@ -104,7 +178,7 @@ class DatabaseClient(metaclass=Singleton):
         Raises:
             ValueError: If `table_name` is not among expected names.
         """
-        if table_name not in db_config.table_names_set:
+        if table_name not in _TABLE_NAMES:
             msg = f"Arg `table_name` must be one of {db_config.table_names}"
             logger.exception(msg)
             raise ValueError(msg)
@@ -113,46 +187,85 @@ class DatabaseClient(metaclass=Singleton):
         """Run initialization SQL scripts for database setup.
 
         Executes all SQL files in the `db_scripts` directory that match
-        the pattern `m_*.sql`. Scripts are run in sorted order.
+        the pattern `m_*.sql`. Scripts are concatenated in sorted order
+        and run as one script in a single transaction.
         """
-        logger.info("Running DB init scripts.")
-        for mf in sorted(db_config.db_scripts.glob("m_*.sql")):
-            with open(mf, "r") as handle:
-                logger.info("Running %s script.", mf.stem)
-                self.conn.executescript(handle.read())
-                self.conn.commit()
-
-    def populate_tables(self):
+        names = sorted(n for n in db_config.scripts if n.startswith("m_"))
+        logger.info("Running DB init scripts %s.", ", ".join(names))
+        self.conn.executescript(
+            "\n;\n".join(["BEGIN", *(db_config.scripts[n] for n in names), "COMMIT;"])
+        )
+
+    def populate_tables(self, existing_tables: set[str] | None = None):
         """Populate the database tables with data.
 
         For each table defined in the config:
         - If it is already populated, skip it.
-        - If it is `rated_books`, populate it using a pre-written SQL script.
+        - If there is a pre-written `s_populate_<table>.sql` script, populate it
+          from other tables using the script.
+        - If it is `rated_titles`, preprocess ratings joined with title IDs
+          of books in memory, so ratings are never stored on their own.
         - Otherwise, preprocess raw data and insert it into the database.
+
+        Rows are inserted by multi-row INSERT statements with as many rows
+        as the SQLite limit on the number of parameters allows.
+
+        If any table was populated, statistics for the query planner are refreshed.
+
+        Args:
+            existing_tables: Tables which existed before running init scripts.
+                If none of the expected tables existed, all are empty and emptiness
+                is not checked. If not provided, emptiness is always checked.
         """
         logger.info("Populating DB tables.")
+        populated = []
+        if existing_tables is not None and _TABLE_NAMES.isdisjoint(existing_tables):
+            empty_tables = _TABLE_NAMES
+
+        else:
+            empty_tables = self.get_empty_tables()
+
         for tn in db_config.table_names:
-            if not self.is_empty(tn):
+            if tn not in empty_tables:
                 logger.info("Table %s is not empty. Skipping.", tn)
                 continue
 
-            if tn == "rated_books":
-                logger.info("Populating rated_books table.")
-                with open(
-                    db_config.db_scripts / "s_populate_rated_books.sql", "r"
-                ) as handle:
-                    self.conn.executescript(handle.read())
-                    self.conn.commit()
+            populated.append(tn)
+
+            populate_script = db_config.scripts.get(f"s_populate_{tn}")
+            if populate_script is not None:
+                logger.info("Populating %s table.", tn)
+                self.conn.executescript(populate_script)
 
                 continue
 
             logger.info("Preprocessing data for table %s.", tn)
-            table, self.kaggle_path = preprocess(tn, self.kaggle_path)
+            if tn == "rated_titles":
+                table = preprocess(
+                    "ratings", pd.read_sql_query(db_config.book_isbns_sql, self.conn)
+                )
+
+            else:
+                table = preprocess(tn)
 
             logger.info("Writing to database.")
-            table.to_sql(tn, self.conn, if_exists="replace")
+            self.conn.execute("BEGIN;")
+            table.to_sql(
+                tn,
+                self.conn,
+                if_exists="append",
+                index=False,
+                chunksize=self.conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+                // len(table.columns),
+                method="multi",
+            )
             self.conn.commit()
 
+        if populated:
+            logger.info("Analyzing DB tables.")
+            self.conn.execute("ANALYZE;")
+            self.data_version += 1
+
     def drop_table(self, table_name: str):
         """Drop a table from the database.
 
@@ -165,4 +278,14 @@ class DatabaseClient(metaclass=Singleton):
         self.validate_table_name(table_name)
 
         self.get_cursor().execute(f"DROP TABLE {table_name}")
-        self.conn.commit()
+        self.data_version += 1
+
+
+@functools.lru_cache(maxsize=1)
+def get_db_client() -> DatabaseClient:
+    """Get the shared `DatabaseClient`, creating it on first call.
+
+    Returns:
+        `DatabaseClient` instance shared by the whole application.
+    """
+    return DatabaseClient()
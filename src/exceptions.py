@@ -1,11 +1,14 @@
+import logging
 import traceback
-from enum import Enum
+from typing import Final
 
 from fastapi import HTTPException
 
+logger = logging.getLogger(__name__)
 
-class ExcCode(str, Enum):
-    """Enumeration of user-facing exception codes.
+
+class ExcCode:
+    """Namespace of user-facing exception codes.
 
     These codes represent specific error conditions that
     can be communicated to the frontend for user feedback.
@@ -15,8 +18,8 @@ class ExcCode(str, Enum):
         NOT_ENOUGH_RATINGS: Indicates insufficient ratings to generate recommendations.
     """
 
-    BOOK_NOT_FOUND = "BOOK_NOT_FOUND"
-    NOT_ENOUGH_RATINGS = "NOT_ENOUGH_RATINGS"
+    BOOK_NOT_FOUND: Final[str] = "BOOK_NOT_FOUND"
+    NOT_ENOUGH_RATINGS: Final[str] = "NOT_ENOUGH_RATINGS"
 
 
 class UserFacingException(HTTPException):
@@ -24,11 +27,12 @@ class UserFacingException(HTTPException):
 
     This exception is meant to be raised when an error should be shown to the user.
     It provides structured details including the error code, message, user input,
-    and (optionally) exception traceback for logging and debugging.
+    and (optionally) exception traceback for logging and debugging. The traceback
+    is only formatted when debug logging is enabled.
 
     Args:
         status_code: HTTP status code to return.
-        exc_code: An `ExcCode` indicating the type of error.
+        exc_code: One of `ExcCode` codes indicating the type of error.
         message: Human-readable message explaining the error.
         input: The input data that caused the error.
         exc: Optional underlying exception that triggered this error.
@@ -37,7 +41,7 @@ class UserFacingException(HTTPException):
     def __init__(
         self,
         status_code: int,
-        exc_code: ExcCode,
+        exc_code: str,
         message: str,
         input: any,
         exc: Exception | None = None,
@@ -45,11 +49,15 @@ class UserFacingException(HTTPException):
         super().__init__(
             status_code=status_code,
             detail={
-                "code": exc_code.value,
+                "code": exc_code,
                 "message": message,
-                "input_type": str(type(input)),
+                "input_type": type(input).__qualname__,
                 "input": input,
-                "exception_type": str(type(exc)) if exc else None,
-                "traceback": traceback.format_exc() if exc else None,
+                "exception_type": type(exc).__qualname__ if exc is not None else None,
+                "traceback": (
+                    "".join(traceback.format_exception(exc))
+                    if exc is not None and logger.isEnabledFor(logging.DEBUG)
+                    else None
+                ),
             },
         )
@@ -18,34 +18,34 @@ books = pd.read_csv(
 # print(len(books["ISBN"]), len(books["ISBN"].unique()))
 # exit()
 # users_ratigs = pd.merge(ratings, users, on=['User-ID'])
-dataset = pd.merge(ratings, books, on=["ISBN"])
-dataset_lowercase = dataset.apply(
-    lambda x: x.str.lower() if (x.dtype == "object") else x
+# join on integer codes of ISBNs (shared by both tables) instead of strings
+isbn_codes, _ = pd.factorize(
+    pd.concat([ratings["ISBN"], books["ISBN"]], ignore_index=True)
+)
+dataset = pd.merge(
+    ratings.assign(ISBN=isbn_codes[: len(ratings)]),
+    books.assign(ISBN=isbn_codes[len(ratings) :]),
+    on=["ISBN"],
+)
+# lowercase only the compared text columns, other columns are not needed
+dataset_lowercase = dataset[["User-ID", "Book-Rating"]].assign(
+    **{c: dataset[c].str.lower() for c in ["Book-Title", "Book-Author"]}
 )
 # print(dataset.loc[dataset["User-ID"] == 254, ["User-ID", "Book-Title", "Book-Rating"]])
 
-tolkien_readers = dataset_lowercase["User-ID"][
-    (
-        dataset_lowercase["Book-Title"]
-        == "the fellowship of the ring (the lord of the rings, part 1)"
-    )
-    & (dataset_lowercase["Book-Author"].str.contains("tolkien"))
-]
+# author is only searched in ratings of the book (plain substring, no regex)
 x = dataset_lowercase.loc[
     dataset_lowercase["Book-Title"]
     == "the fellowship of the ring (the lord of the rings, part 1)"
 ]
 # print(x)
-y = x.loc[x["Book-Author"].str.contains("tolkien")]
-# print(y[["ISBN", "Book-Rating", "Book-Author"]])
+y = x.loc[x["Book-Author"].str.contains("tolkien", regex=False, na=False)]
+# print(y[["User-ID", "Book-Rating", "Book-Author"]])
+tolkien_readers = y["User-ID"]
 # print(tolkien_readers)
 # exit()
-tolkien_readers2 = tolkien_readers.unique()
-tolkien_readers = tolkien_readers.tolist()
-tolkien_readers = np.unique(tolkien_readers)
+tolkien_readers = tolkien_readers.unique()
 
-# print(sorted(tolkien_readers) == )
-# print(sorted(tolkien_readers2))
 # exit()
 # final dataset
 books_of_tolkien_readers = dataset_lowercase[
@@ -53,36 +53,45 @@ books_of_tolkien_readers = dataset_lowercase[
 ]
 
 # Number of ratings per other books in dataset
-number_of_rating_per_book = (
-    books_of_tolkien_readers.groupby(["Book-Title"]).agg("count").reset_index()
-)
-# print(number_of_rating_per_book["User-ID"].unique())
+number_of_rating_per_book = books_of_tolkien_readers["Book-Title"].value_counts()
 # exit()
 
 # select only books which have actually higher number of ratings than threshold
-books_to_compare = number_of_rating_per_book["Book-Title"][
-    number_of_rating_per_book["User-ID"] >= 8
-]
-books_to_compare = books_to_compare.tolist()
+books_to_compare = set(number_of_rating_per_book.index[number_of_rating_per_book >= 8])
 
+# users and books as categorical, so grouping works on integer codes
 ratings_data_raw = books_of_tolkien_readers[["User-ID", "Book-Rating", "Book-Title"]][
-    books_of_tolkien_readers["Book-Title"].isin(books_to_compare)
-]
+    books_of_tolkien_readers["Book-Title"].map(books_to_compare.__contains__)
+].astype({"User-ID": "category", "Book-Title": "category"})
 # print(ratings_data_raw)
 # group by User and Book and compute mean
-ratings_data_raw_nodup = ratings_data_raw.groupby(["User-ID", "Book-Title"])[
-    "Book-Rating"
-].mean()
+ratings_data_raw_nodup = ratings_data_raw.groupby(
+    ["User-ID", "Book-Title"], observed=True, sort=False
+)["Book-Rating"].mean()
 # print(ratings_data_raw_nodup)
 
 # reset index to see User-ID in every row
 ratings_data_raw_nodup = ratings_data_raw_nodup.to_frame().reset_index()
 
 # print(ratings_data_raw_nodup)
-dataset_for_corr = ratings_data_raw_nodup.pivot(
-    index="User-ID", columns="Book-Title", values="Book-Rating"
+# ratings stay in long format (one row per user and book) instead of a mostly
+# empty users x books pivot table: users and books as integer codes, books
+# sorted by title, ratings shifted by mean rating of each book (correlation
+# does not change)
+book_codes, books_for_corr = pd.factorize(
+    ratings_data_raw_nodup["Book-Title"], sort=True
 )
-# print(dataset_for_corr)
+user_codes, _ = pd.factorize(ratings_data_raw_nodup["User-ID"])
+ratings_values = ratings_data_raw_nodup["Book-Rating"].to_numpy(dtype=np.float64)
+ratings_centered = (
+    ratings_values
+    - (np.bincount(book_codes, ratings_values) / np.bincount(book_codes))[book_codes]
+)
+
+# average rating of each book, computed once for all compared books
+avg_rating_by_title = ratings_data_raw.groupby("Book-Title", observed=True, sort=False)[
+    "Book-Rating"
+].mean()
 # exit()
 LoR_list = ["the fellowship of the ring (the lord of the rings, part 1)"]
 
@@ -91,52 +100,48 @@ worst_list = []
 
 # for each of the trilogy book compute:
 for LoR_book in LoR_list:
-    # Take out the Lord of the Rings selected book from correlation dataframe
-    dataset_of_other_books = dataset_for_corr.copy(deep=False)
-    # print(dataset_of_other_books)
-    dataset_of_other_books.drop([LoR_book], axis=1, inplace=True)
-    # print(dataset_of_other_books)
-
-    # empty lists
-    book_titles = []
-    correlations = []
-    avgrating = []
-    # print(dataset_for_corr[LoR_book])
-    # corr computation
-    for book_title in list(dataset_of_other_books.columns.values):
-        # print(dataset_of_other_books[book_title])
-        book_titles.append(book_title)
-        # print(dataset_for_corr[LoR_book].corr(dataset_of_other_books[book_title]))
-        correlations.append(
-            dataset_for_corr[LoR_book].corr(dataset_of_other_books[book_title])
-        )
-        # print(ratings_data_raw[ratings_data_raw["Book-Title"] == book_title])
-        # NOTE: broken
-        # tab = (
-        #     ratings_data_raw[ratings_data_raw["Book-Title"] == book_title]
-        #     .groupby(ratings_data_raw["Book-Title"])
-        #     .mean()
-        # )
-        tab = ratings_data_raw.loc[
-            ratings_data_raw["Book-Title"] == book_title, "Book-Rating"
-        ].mean()
-        # print("tab")
-        # print(tab)
-        # avgrating.append(tab["Book-Rating"].min())
-        avgrating.append(tab)
+    # Take out the Lord of the Rings selected book from compared books
+    LoR_code = books_for_corr.get_loc(LoR_book)
+    other_books = np.arange(len(books_for_corr)) != LoR_code
+
+    # corr computation for all other books at once: rating of the selected book
+    # by the user of each rating, then sums over users who rated both books
+    # accumulated per book
+    is_LoR = book_codes == LoR_code
+    x_by_user = np.full(user_codes.max() + 1, np.nan)
+    x_by_user[user_codes[is_LoR]] = ratings_centered[is_LoR]
+    x = x_by_user[user_codes]
+    common = ~np.isnan(x)
+    b, x, y = book_codes[common], x[common], ratings_centered[common]
+    n, sx, sy, sxx, syy, sxy = (
+        np.bincount(b, w, minlength=len(books_for_corr))[other_books]
+        for w in (None, x, y, x * x, y * y, x * y)
+    )
+    var_x = n * sxx - sx * sx
+    var_y = n * syy - sy * sy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlations = (n * sxy - sx * sy) / np.sqrt(var_x * var_y)
+    # same ratings from all common readers (up to rounding) -> no correlation
+    correlations[(var_x <= 1e-12 * n * sxx) | (var_y <= 1e-12 * n * syy)] = np.nan
+
+    book_titles = books_for_corr[other_books]
+    avgrating = avg_rating_by_title.reindex(book_titles).to_numpy()
     # final dataframe of all correlation of each book
     corr_fellowship = pd.DataFrame(
-        list(zip(book_titles, correlations, avgrating)),
-        columns=["book", "corr", "avg_rating"],
+        {
+            "book": np.asarray(book_titles, dtype=object),
+            "corr": correlations,
+            "avg_rating": avgrating,
+        }
     )
     # print(corr_fellowship)
     corr_fellowship.head()
 
     # top 10 books with highest corr
-    result_list.append(corr_fellowship.sort_values("corr", ascending=False).head(10))
+    result_list.append(corr_fellowship.nlargest(10, "corr"))
 
-    # worst 10 books
-    worst_list.append(corr_fellowship.sort_values("corr", ascending=False).tail(10))
+    # worst 10 books (lowest corr first, books without corr are left out)
+    worst_list.append(corr_fellowship.nsmallest(10, "corr"))
 
 print("Correlation for book:", LoR_list[0])
 # print("Average rating of LOR:", ratings_data_raw[ratings_data_raw['Book-Title']=='the fellowship of the ring (the lord of the rings, part 1'].groupby(ratings_data_raw['Book-Title']).mean()))
@@ -5,45 +5,20 @@ import typing_extensions as te
 class RecommendRequestBody(pydantic.BaseModel):
     """Request schema for book recommendation queries.
 
+    Numeric book titles are cast to strings, surrounding whitespace is stripped
+    and unknown fields are rejected. All validation runs in pydantic-core.
+
     Attributes:
         book_title: Title of the book to base the recommendations on.
-        top_n: Number of top recommendations to return.
+        top_n: Number of top recommendations to return, non-negative.
     """
 
-    book_title: str
-    top_n: int
-
-    @pydantic.field_validator("book_title", mode="before")
-    def force_cast_str(book_title: any) -> str:
-        """Force cast provided book_title to string.
-
-        Will fail if provided book_title is not able to be cast to string.
-
-        Args:
-            book_title: Book title to be cast to string.
+    model_config = pydantic.ConfigDict(
+        coerce_numbers_to_str=True, str_strip_whitespace=True, extra="forbid"
+    )
 
-        Returns:
-            Book title as string.
-        """
-        return str(book_title)
-
-    @pydantic.field_validator("top_n", mode="after")
-    def check_non_neg_top_n(top_n: int) -> int:
-        """Validate that `top_n` is non-negative.
-
-        Args:
-            top_n: Number of recommendations requested.
-
-        Returns:
-            The same value if validation passes.
-
-        Raises:
-            ValueError: If `top_n` is negative.
-        """
-        if top_n < 0:
-            raise ValueError("Parameter `top_n` must be non-negative.")
-
-        return top_n
+    book_title: str
+    top_n: te.Annotated[int, pydantic.Field(ge=0)]
 
 
 class RecommendResponseRecord(pydantic.BaseModel):
@@ -1,15 +1,25 @@
+import functools
 import html
 import logging
 import re
 from pathlib import Path
-from typing import Literal
+from typing import Callable, Literal
 
 import ftfy
 import kagglehub
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 
 from src.config import LoggingConfig, config
 
+logger = logging.getLogger(__name__)
+
+_SNAKE_CASE_SEPARATORS = re.compile(r"[\-\s]+")
+_SNAKE_CASE_WORD_BOUNDARIES = re.compile(r"([a-z0-9])([A-Z])")
+
 
 def to_snake_case(text: str) -> str:
     """Convert a string to snake_case.
@@ -20,8 +30,8 @@ def to_snake_case(text: str) -> str:
     Returns:
         Text converted to snake case.
     """
-    text = re.sub(r"[\-\s]+", "_", text)
-    text = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", text)
+    text = _SNAKE_CASE_SEPARATORS.sub("_", text)
+    text = _SNAKE_CASE_WORD_BOUNDARIES.sub(r"\1_\2", text)
     return text.lower()
 
 
@@ -40,6 +50,78 @@ def clean_text(text: str) -> str:
     return html.unescape(ftfy.fix_text(text))
 
 
+def clean_text_series(texts: pd.Series) -> pd.Series:
+    """Clean a series of texts using `clean_text`.
+
+    Only texts containing `&` or characters other than printable ASCII can be changed
+    by `clean_text`, so these are selected by a vectorized regex and the rest is kept
+    as is without calling `clean_text` for every element. Selected texts repeat a lot
+    (authors, publishers), so `clean_text` is called once per distinct text. Texts
+    are kept in PyArrow string arrays, so the regex runs as an Arrow kernel.
+
+    Args:
+        texts: String series to clean.
+
+    Returns:
+        Clean PyArrow-backed string series.
+    """
+    texts = texts.astype("string[pyarrow]")
+    needs_cleaning = texts.str.contains(r"[^\x20-\x7e]|&", regex=True, na=False)
+    codes, uniques = pd.factorize(texts.loc[needs_cleaning])
+    cleaned = pd.array([clean_text(t) for t in uniques], dtype="string[pyarrow]")
+    texts.loc[needs_cleaning] = cleaned.take(codes)
+
+    return texts
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a book title the same way as `book_title_lc` column is created.
+
+    Args:
+        title: Book title to normalize.
+
+    Returns:
+        Stripped, cleaned and lowercased title.
+    """
+    return clean_text(title.strip()).lower()
+
+
+def pearson_from_sums(
+    n: np.ndarray,
+    sx: np.ndarray,
+    sy: np.ndarray,
+    sxx: np.ndarray,
+    syy: np.ndarray,
+    sxy: np.ndarray,
+) -> np.ndarray:
+    """Compute Pearson correlations from sums over paired samples.
+
+    Each element of the arguments describes one pair of samples (x, y). For integer
+    sums the covariance and variances are computed exactly, so constant samples are
+    reliably recognized.
+
+    Args:
+        n: Number of pairs.
+        sx: Sum of x.
+        sy: Sum of y.
+        sxx: Sum of x squared.
+        syy: Sum of y squared.
+        sxy: Sum of products of x and y.
+
+    Returns:
+        1D array with correlations. NaN where the correlation is undefined
+        (less than two pairs or zero variance).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corrs = (n * sxy - sx * sy) / (
+            np.sqrt(n * sxx - sx * sx) * np.sqrt(n * syy - sy * sy)
+        )
+
+    corrs[n < 2] = np.nan
+
+    return np.clip(corrs, -1.0, 1.0)
+
+
 def download_from_kaggle(handle: str) -> Path:
     """Download dataset from Kaggle.
 
@@ -52,23 +134,128 @@ def download_from_kaggle(handle: str) -> Path:
     return Path(kagglehub.dataset_download(handle))
 
 
-def preprocess_books(kaggle_path: str | None = None) -> tuple[pd.DataFrame, str]:
-    """Load and preprocess the Books dataset from the Kaggle directory.
+@functools.lru_cache(maxsize=1)
+def get_kaggle_path() -> Path:
+    """Get path to the Kaggle dataset, downloading it on first call.
 
-    If the path is not provided, downloads the dataset using the Kaggle handle.
-    Performs column renaming, text cleaning, and normalization of publication years.
+    Returns:
+        Path to the downloaded dataset.
+    """
+    return download_from_kaggle(config.kaggle_handle)
+
+
+def skip_invalid_row(row: pacsv.InvalidRow) -> str:
+    """Log an invalid CSV row and tell the PyArrow CSV reader to skip it.
+
+    Args:
+        row: Invalid row reported by the reader.
+
+    Returns:
+        Action for the reader, always "skip".
+    """
+    logger.warning("Skipping invalid CSV row: %s", row.text)
+    return "skip"
+
+
+def read_csv_table(
+    path: Path,
+    column_types: dict[str, pa.DataType],
+    encoding: str = "utf8",
+    batch_filter: Callable[[pa.RecordBatch], pa.Array] | None = None,
+) -> pa.Table:
+    """Read a CSV file into an Arrow table with the multithreaded PyArrow CSV reader.
+
+    Quoted values may contain newlines, invalid rows are logged and skipped
+    and empty strings are read as missing values. If `batch_filter` is given,
+    the file is streamed in record batches and only rows selected by the filter
+    are kept, so the unfiltered table is never held in memory.
+
+    Args:
+        path: Path to the CSV file.
+        column_types: Types of columns which should not be inferred.
+        encoding: Encoding of the CSV file.
+        batch_filter: Optional function returning a boolean mask of rows to keep
+            in a record batch.
+
+    Returns:
+        Content of the CSV file as a PyArrow table.
+    """
+    options = {
+        "read_options": pacsv.ReadOptions(encoding=encoding, use_threads=True),
+        "parse_options": pacsv.ParseOptions(
+            newlines_in_values=True, invalid_row_handler=skip_invalid_row
+        ),
+        "convert_options": pacsv.ConvertOptions(
+            column_types=column_types, strings_can_be_null=True
+        ),
+    }
+    if batch_filter is None:
+        return pacsv.read_csv(path, **options)
+
+    with pacsv.open_csv(path, **options) as reader:
+        return pa.Table.from_batches(
+            (batch.filter(batch_filter(batch)) for batch in reader),
+            schema=reader.schema,
+        )
+
+
+def to_pandas(table: pa.Table) -> pd.DataFrame:
+    """Convert an Arrow table to a pandas DataFrame.
+
+    String columns stay in Arrow memory as PyArrow-backed pandas strings instead
+    of Python objects.
 
     Args:
-        kaggle_path: Optional path to the local Kaggle dataset directory.
+        table: Arrow table to convert.
 
     Returns:
-        A tuple containing the preprocessed books DataFrame and the dataset path used.
+        Content of the table as a pandas DataFrame.
     """
-    if kaggle_path is None:
-        kaggle_path = download_from_kaggle(config.kaggle_handle)
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+def read_csv(
+    path: Path, column_types: dict[str, pa.DataType], encoding: str = "utf8"
+) -> pd.DataFrame:
+    """Read a CSV file with the multithreaded PyArrow CSV reader.
 
-    books = pd.read_csv(
-        kaggle_path / "Books.csv", sep=",", on_bad_lines="warn", encoding="cp1251"
+    See `read_csv_table` and `to_pandas`.
+
+    Args:
+        path: Path to the CSV file.
+        column_types: Types of columns which should not be inferred.
+        encoding: Encoding of the CSV file.
+
+    Returns:
+        Content of the CSV file as a pandas DataFrame.
+    """
+    return to_pandas(read_csv_table(path, column_types, encoding))
+
+
+def preprocess_books() -> pd.DataFrame:
+    """Load and preprocess the Books dataset from the Kaggle directory.
+
+    The dataset is downloaded by `get_kaggle_path` if not yet available.
+    The CSV is parsed by the multithreaded PyArrow reader with text columns read as strings.
+    Performs column renaming, text cleaning, and normalization of publication years.
+    Stripping and cleaning run on PyArrow string arrays.
+
+    Returns:
+        The preprocessed books DataFrame.
+    """
+    books = read_csv(
+        get_kaggle_path() / "Books.csv",
+        column_types={
+            c: pa.string()
+            for c in [
+                "ISBN",
+                "Book-Title",
+                "Book-Author",
+                "Year-Of-Publication",
+                "Publisher",
+            ]
+        },
+        encoding="cp1251",
     )
     books.columns = map(to_snake_case, books.columns)
     books["year_of_publication"] = (
@@ -77,64 +264,88 @@ def preprocess_books(kaggle_path: str | None = None) -> tuple[pd.DataFrame, str]
         .replace([0], pd.NA)
     )
     for c in config.string_cols[: config.non_lc_bound]:
-        books[c] = books[c].astype("string").str.strip()
-        books[c] = books[c].map(clean_text)
+        books[c] = clean_text_series(books[c].str.strip())
 
-    books["book_title_lc"] = books["book_title"].str.lower()
+    # Python lowercasing, same as `normalize_title` (Arrow differs for e.g. "İ").
+    books["book_title_lc"] = books["book_title"].astype("string[python]").str.lower()
 
-    return books, kaggle_path
+    return books
 
 
-def preprocess_ratings(kaggle_path: str | None = None) -> tuple[pd.DataFrame, str]:
+def preprocess_ratings(book_isbns: pd.DataFrame) -> pd.DataFrame:
     """Load and preprocess the Ratings dataset from the Kaggle directory.
 
-    If the path is not provided, downloads the dataset using the Kaggle handle.
-    Performs column renaming and filters out zero ratings.
+    The dataset is downloaded by `get_kaggle_path` if not yet available.
+    The CSV is parsed by the multithreaded PyArrow reader, user IDs are stored
+    as `int32` and ratings (0-10) as `uint8`. Zero ratings are filtered out
+    batch by batch while streaming the file. Performs column renaming and joins
+    ratings with the given books on Arrow tables, so the ratings are converted
+    to pandas only once.
 
     Args:
-        kaggle_path: Optional path to the local Kaggle dataset directory.
+        book_isbns: DataFrame with `isbn` of books and columns to add to their ratings.
+            Ratings of other books are dropped.
 
     Returns:
-        A tuple containing the preprocessed ratings DataFrame and the dataset path used.
+        The preprocessed ratings DataFrame.
     """
-    if kaggle_path is None:
-        kaggle_path = download_from_kaggle(config.kaggle_handle)
-
-    ratings = pd.read_csv(kaggle_path / "Ratings.csv", sep=",", on_bad_lines="warn")
-    ratings.columns = map(to_snake_case, ratings.columns)
-    ratings = ratings.loc[ratings["book_rating"] > 0]
+    ratings = read_csv_table(
+        get_kaggle_path() / "Ratings.csv",
+        column_types={
+            "User-ID": pa.int32(),
+            "ISBN": pa.string(),
+            "Book-Rating": pa.uint8(),
+        },
+        batch_filter=lambda batch: pc.greater(batch["Book-Rating"], 0),
+    )
+    ratings = ratings.rename_columns([to_snake_case(c) for c in ratings.column_names])
+    ratings = ratings.join(
+        pa.Table.from_pandas(book_isbns, preserve_index=False),
+        "isbn",
+        join_type="inner",
+    )
 
-    return ratings, kaggle_path
+    return to_pandas(ratings)
 
 
 def preprocess(
-    table_name: Literal["books", "ratings"], kaggle_path: str | None
-) -> tuple[pd.DataFrame, str]:
+    table_name: Literal["books", "ratings"], book_isbns: pd.DataFrame | None = None
+) -> pd.DataFrame:
     """Dispatch preprocessing based on table name.
 
     Calls the appropriate preprocessing function for 'books' or 'ratings'.
 
     Args:
         table_name: Name of the table to preprocess. Must be either "books" or "ratings".
-        kaggle_path: Optional path to the local Kaggle dataset directory.
+        book_isbns: Books to join ratings with, required for "ratings".
 
     Returns:
-        A tuple containing the preprocessed DataFrame and the dataset path used.
+        The preprocessed DataFrame.
     """
     if table_name == "books":
-        return preprocess_books(kaggle_path)
+        return preprocess_books()
 
     if table_name == "ratings":
-        return preprocess_ratings(kaggle_path)
+        return preprocess_ratings(book_isbns)
+
+
+@functools.lru_cache(maxsize=1)
+def get_logging_config() -> dict[str, any]:
+    """Build the logging configuration dictionary once.
+
+    Returns:
+        `LoggingConfig` converted to a dictionary for `logging.config.dictConfig`.
+    """
+    return LoggingConfig().to_dict()
 
 
 def setup_logging():
     """Apply the logging configuration.
 
     Creates the logs directory if it does not exist and sets up the logging configuration
-    defined in LoggingConfig.
+    defined in LoggingConfig. The configuration dictionary is built only on first use.
     """
-    log_config = LoggingConfig().to_dict()
+    log_config = get_logging_config()
 
     config.logs_dir.mkdir(exist_ok=True)
 
@@ -0,0 +1,241 @@
+import dataclasses
+import sqlite3
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+import src.book_recommender as book_recommender
+from src.config import config, db_config
+from src.exceptions import ExcCode, UserFacingException
+
+
+@pytest.fixture
+def ratings() -> pd.DataFrame:
+    """Random ratings of five books, each with two editions.
+
+    Returns:
+        DataFrame with `user_id`, `isbn`, `book_rating`, `title_id`
+        and `book_title_lc` of each rating.
+    """
+    rng = np.random.default_rng(42)
+    records = []
+    for user_id in range(1, 16):
+        for title_id in range(1, 6):
+            if rng.random() < 0.2:
+                continue
+
+            for edition in rng.choice(
+                ["a", "b"], size=rng.integers(1, 3), replace=False
+            ):
+                records.append(
+                    (user_id, f"{title_id}-{edition}", rng.integers(1, 11), title_id)
+                )
+
+    # book rated by too few readers of any book to be compared
+    records += [(1, "6-a", 7, 6), (2, "6-a", 9, 6)]
+
+    ratings = pd.DataFrame(
+        records, columns=["user_id", "isbn", "book_rating", "title_id"]
+    )
+    ratings["book_title_lc"] = "book " + ratings["title_id"].astype(str)
+
+    return ratings
+
+
+@pytest.fixture
+def recommender(
+    ratings: pd.DataFrame, monkeypatch: MonkeyPatch
+) -> book_recommender.BookRecommender:
+    """BookRecommender reading from an in-memory database filled with `ratings`.
+
+    Args:
+        ratings: Ratings fixture. It is passed automatically by pytest.
+        monkeypatch: Monkeypatch fixture used for mocking.
+            It is passed automatically by pytest.
+
+    Returns:
+        BookRecommender instance.
+    """
+    conn = sqlite3.connect(":memory:")
+    for name in sorted(n for n in db_config.scripts if n.startswith("m_")):
+        conn.executescript(db_config.scripts[name])
+
+    titles = ratings[["title_id", "book_title_lc"]].drop_duplicates()
+    titles.to_sql("titles", conn, if_exists="append", index=False)
+    ratings.drop(columns="book_title_lc").to_sql(
+        "rated_titles", conn, if_exists="append", index=False
+    )
+    conn.executescript(db_config.scripts["s_populate_title_stats"])
+
+    db = SimpleNamespace(get_thread_connection=lambda: conn, data_version=0)
+    monkeypatch.setattr(book_recommender, "get_db_client", lambda: db)
+
+    return book_recommender.BookRecommender()
+
+
+def pivot_correlations(ratings: pd.DataFrame, book_title_lc: str) -> pd.DataFrame:
+    """Compute correlations with a pivot table and `pd.Series.corr`.
+
+    Args:
+        ratings: Ratings of all books.
+        book_title_lc: Lowercase title of the book to compute correlations with.
+
+    Returns:
+        DataFrame with `book_title_lc`, `correlation_with_selected_book`
+        and `average_rating` of books with non-negative correlation.
+    """
+    readers = ratings.loc[ratings.book_title_lc == book_title_lc, "user_id"]
+    ratings = ratings.loc[ratings.user_id.isin(readers)]
+    n_ratings = ratings.groupby("book_title_lc")["user_id"].count()
+    ratings = ratings.loc[
+        ratings.book_title_lc.isin(n_ratings.index[n_ratings >= config.min_n_ratings])
+    ]
+
+    df_corr = (
+        ratings.groupby(["user_id", "book_title_lc"])["book_rating"]
+        .mean()
+        .round(2)
+        .reset_index()
+        .pivot(index="user_id", columns="book_title_lc", values="book_rating")
+    )
+
+    correlations = []
+    for bt in df_corr.columns.drop(book_title_lc):
+        correlation = df_corr[book_title_lc].corr(df_corr[bt])
+        if pd.isna(correlation) or correlation < 0:
+            continue
+
+        correlations.append(
+            {
+                "book_title_lc": bt,
+                "correlation_with_selected_book": round(correlation, 2),
+                "average_rating": round(
+                    ratings.loc[ratings.book_title_lc == bt, "book_rating"].mean(), 2
+                ),
+            }
+        )
+
+    return pd.DataFrame(
+        correlations,
+        columns=["book_title_lc", "correlation_with_selected_book", "average_rating"],
+    ).astype({"correlation_with_selected_book": float, "average_rating": float})
+
+
+@pytest.mark.parametrize(
+    argnames="book_title_lc",
+    argvalues=[f"book {i}" for i in range(1, 6)],
+)
+def test_calcualte_correlations(
+    recommender: book_recommender.BookRecommender,
+    ratings: pd.DataFrame,
+    book_title_lc: str,
+):
+    """Test `BookRecommender.calcualte_correlations` against a pivot table.
+
+    Args:
+        recommender: BookRecommender fixture. It is passed automatically by pytest.
+        ratings: Ratings fixture. It is passed automatically by pytest.
+        book_title_lc: Lowercase title of the book to compute correlations with.
+    """
+    result = recommender.calcualte_correlations(book_title_lc)
+    expectation = pivot_correlations(ratings, book_title_lc)
+
+    assert result["correlation_with_selected_book"].is_monotonic_decreasing
+    pd.testing.assert_frame_equal(
+        result.sort_values("book_title_lc").reset_index(drop=True),
+        expectation.sort_values("book_title_lc").reset_index(drop=True),
+    )
+
+
+@pytest.mark.parametrize(
+    argnames=("book_title_lc", "exc_code"),
+    argvalues=[
+        ("no such book", ExcCode.BOOK_NOT_FOUND),
+        ("book 6", ExcCode.NOT_ENOUGH_RATINGS),
+    ],
+    ids=["book_not_found", "not_enough_ratings"],
+)
+def test_calcualte_correlations_exceptions(
+    recommender: book_recommender.BookRecommender, book_title_lc: str, exc_code: str
+):
+    """Test exceptions raised by `BookRecommender.calcualte_correlations`.
+
+    Args:
+        recommender: BookRecommender fixture. It is passed automatically by pytest.
+        book_title_lc: Lowercase title of the book to compute correlations with.
+        exc_code: Expected `ExcCode` of the exception.
+    """
+    with pytest.raises(UserFacingException) as exc_info:
+        recommender.calcualte_correlations(book_title_lc)
+
+    assert exc_info.value.detail["code"] == exc_code
+    assert exc_info.value.detail["input"] == book_title_lc
+
+
+@pytest.mark.parametrize(
+    argnames=("title", "max_n_suggestions", "expectation"),
+    argvalues=[
+        (
+            "FARM",
+            10,
+            ["Farm Life", "Farmer Giles", "Animal Farm", "Old Farmhouse", "The Farm"],
+        ),
+        ("farm", 3, ["Farm Life", "Farmer Giles", "Animal Farm"]),
+        ("farm", 1, ["Farm Life"]),
+        ("zoo", 10, ["Zoo"]),
+        ("m\nf", 10, []),
+        (
+            "fa\nrm",
+            10,
+            ["Farm Life", "Farmer Giles", "Animal Farm", "Old Farmhouse", "The Farm"],
+        ),
+    ],
+    ids=[
+        "prefix_first",
+        "limit_substring",
+        "limit_prefix",
+        "single",
+        "across_titles",
+        "newline_removed",
+    ],
+)
+def test_get_book_titles_by_title(
+    recommender: book_recommender.BookRecommender,
+    monkeypatch: MonkeyPatch,
+    title: str,
+    max_n_suggestions: int,
+    expectation: list[str],
+):
+    """Test `BookRecommender.get_book_titles_by_title` method.
+
+    Args:
+        recommender: BookRecommender fixture. It is passed automatically by pytest.
+        monkeypatch: Monkeypatch fixture used for mocking.
+            It is passed automatically by pytest.
+        title: Partial title to search for.
+        max_n_suggestions: Maximum number of suggested titles.
+        expectation: Titles expected to be suggested.
+    """
+    monkeypatch.setattr(
+        book_recommender,
+        "config",
+        dataclasses.replace(config, max_n_suggestions=max_n_suggestions),
+    )
+    recommender.set_book_titles(
+        sorted(
+            (t.lower(), t)
+            for t in [
+                "Animal Farm",
+                "Farm Life",
+                "Farmer Giles",
+                "Old Farmhouse",
+                "The Farm",
+                "Zoo",
+            ]
+        )
+    )
+
+    assert recommender.get_book_titles_by_title(title) == expectation
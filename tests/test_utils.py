@@ -1,10 +1,23 @@
 from pathlib import Path
 
 import kagglehub
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
 
-from utils import clean_text, download_from_kaggle, to_snake_case
+from utils import (
+    clean_text,
+    clean_text_series,
+    download_from_kaggle,
+    normalize_title,
+    pearson_from_sums,
+    read_csv,
+    read_csv_table,
+    to_snake_case,
+)
 
 
 @pytest.mark.parametrize(
@@ -42,6 +55,87 @@ def test_clean_text(text_to_clean: str, expectation: str):
     assert clean_text(text_to_clean) == expectation
 
 
+def test_clean_text_series():
+    """Test `clean_text_series` function against element-wise `clean_text`."""
+    texts = pd.Series(
+        [
+            "FranÃ§ais",
+            "Tom &amp; Jerry",
+            "Animal Farm",
+            "Ï¿½",
+            None,
+            "line\r\nbreak",
+            "FranÃ§ais",
+        ],
+        dtype="string",
+    )
+
+    result = clean_text_series(texts)
+    expectation = texts.map(clean_text).astype("string[pyarrow]")
+
+    pd.testing.assert_series_equal(result, expectation)
+
+
+@pytest.mark.parametrize(
+    argnames=("title_to_normalize", "expectation"),
+    argvalues=[
+        ("  Animal Farm ", "animal farm"),
+        ("FranÃ§ais", "français"),
+        ("Tom &amp; Jerry", "tom & jerry"),
+    ],
+    ids=["whitespace", "mojibake", "html_escape"],
+)
+def test_normalize_title(title_to_normalize: str, expectation: str):
+    """Test `normalize_title` function.
+
+    Args:
+        title_to_normalize: Title to normalize.
+        expectation: Title expected after normalization.
+    """
+    assert normalize_title(title_to_normalize) == expectation
+
+
+def test_read_csv(tmp_path: Path):
+    """Test `read_csv` function.
+
+    Args:
+        tmp_path: Temporary directory fixture. It is passed automatically by pytest.
+    """
+    csv_path = tmp_path / "ratings.csv"
+    csv_path.write_text(
+        'ISBN,Book-Rating\n"034545104X",5\n"0155061224",3,1\n"multi\nline",\n',
+        encoding="utf-8",
+    )
+
+    result = read_csv(csv_path, column_types={"ISBN": pa.string()})
+
+    assert result["ISBN"].tolist() == ["034545104X", "multi\nline"]
+    assert result["Book-Rating"].iloc[0] == 5
+    assert pd.isna(result["Book-Rating"].iloc[1])
+
+
+def test_read_csv_table_batch_filter(tmp_path: Path):
+    """Test `read_csv_table` function with a batch filter.
+
+    Args:
+        tmp_path: Temporary directory fixture. It is passed automatically by pytest.
+    """
+    csv_path = tmp_path / "ratings.csv"
+    csv_path.write_text(
+        "ISBN,Book-Rating\n034545104X,5\n0155061224,0\n0446520802,7\n",
+        encoding="utf-8",
+    )
+
+    result = read_csv_table(
+        csv_path,
+        column_types={"ISBN": pa.string(), "Book-Rating": pa.uint8()},
+        batch_filter=lambda batch: pc.greater(batch["Book-Rating"], 0),
+    )
+
+    assert result["ISBN"].to_pylist() == ["034545104X", "0446520802"]
+    assert result.schema.field("Book-Rating").type == pa.uint8()
+
+
 def test_download_from_kaggle(monkeypatch: MonkeyPatch):
     """Test `download_from_kaggle` function.
 
@@ -60,3 +154,31 @@ def test_download_from_kaggle(monkeypatch: MonkeyPatch):
 
     assert isinstance(result, Path)
     assert result == Path(mock_path)
+
+
+def test_pearson_from_sums():
+    """Test `pearson_from_sums` function against pairwise `pd.Series.corr`."""
+    df = pd.DataFrame(
+        {
+            "target": [5, 7, None, 9, 1, 3],
+            "positive": [4, 6, 2, 8, None, 2],
+            "negative": [6, 3, 7, 1, 9, 8],
+            "single_common": [None, None, 4, 2, None, None],
+            "constant": [3, 3, 3, 3, 3, 3],
+        },
+        dtype="Int64",
+    )
+    pairs = [df[["target", c]].dropna().to_numpy("int64").T for c in df.columns]
+    sums = np.array(
+        [
+            [len(x), x.sum(), y.sum(), (x * x).sum(), (y * y).sum(), (x * y).sum()]
+            for x, y in pairs
+        ]
+    )
+
+    result = pearson_from_sums(*sums.T)
+    expectation = [
+        df["target"].astype(float).corr(df[c].astype(float)) for c in df.columns
+    ]
+
+    np.testing.assert_allclose(result, expectation, equal_nan=True)